@@ -93,6 +93,9 @@ class PostgreSQLConnection:
             "Connecting to PostgreSQL: %s", self._sanitize_conninfo(conninfo)
         )
 
+        # Keyword arguments for every psycopg connection, pooled or not
+        self._connect_kwargs = self._get_connect_kwargs(options)
+
         # Handle connection pooling if requested
         pool_size = options.get("pool_size", 0)
         if pool_size > 1:
@@ -179,6 +182,28 @@ class PostgreSQLConnection:
         self.log.debug("Final conninfo: %s, options: %s", conninfo, options)
         return conninfo, options
 
+    def _get_connect_kwargs(self, options):
+        """
+        Build psycopg connection arguments from the parsed options.
+
+        ``prepare_threshold`` is only passed when given, so psycopg's own
+        default applies otherwise. Server-side prepared statements do not
+        work behind transaction-pooling proxies such as PgBouncer; use
+        ``prepare_threshold=none`` there to disable them.
+
+        :param options: Options parsed from the connection string
+        :type options: dict
+        :returns: Keyword arguments for psycopg.connect
+        :rtype: dict
+        """
+        kwargs = {}
+        if "prepare_threshold" in options:
+            value = options["prepare_threshold"]
+            kwargs["prepare_threshold"] = (
+                None if value.lower() == "none" else int(value)
+            )
+        return kwargs
+
     def _sanitize_conninfo(self, conninfo):
         """Sanitize connection info for logging (hide passwords)."""
         # Hide password in connection string
@@ -207,7 +232,7 @@ class PostgreSQLConnection:
     def _create_connection(self, conninfo):
         """Create a single database connection."""
         self.log.debug("Creating connection with conninfo: %s", conninfo)
-        self._connection = psycopg.connect(conninfo)
+        self._connection = psycopg.connect(conninfo, **self._connect_kwargs)
         self._connection.autocommit = False
 
     def _create_pool(self, conninfo, pool_size):
@@ -222,6 +247,7 @@ class PostgreSQLConnection:
             min_size=1,
             max_size=pool_size,
             timeout=30.0,
+            kwargs=self._connect_kwargs,
         )
         self.log.info("Created connection pool with size %s", pool_size)
 
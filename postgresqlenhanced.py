@@ -39,7 +39,11 @@ import logging
 import os
 import re
 import pickle
+import random
 import sys
+import time
+from contextlib import contextmanager
+from functools import lru_cache
 from urllib.parse import urlparse, parse_qs
 
 # -------------------------------------------------------------------------
@@ -69,8 +73,11 @@ from gramps.gen.const import GRAMPS_LOCALE as glocale
 
 # from gramps.gen.db.dbconst import ARRAYSIZE  # Currently unused
 from gramps.plugins.db.dbapi.dbapi import DBAPI
+from gramps.gen.db.dbconst import PERSON_KEY, REFERENCE_KEY, TXNADD
 from gramps.gen.db.exceptions import DbConnectionError
+from gramps.gen.lib import Person
 from gramps.gen.lib.serialize import JSONSerializer
+from gramps.gen.utils.id import create_id
 
 # Get translation function for addon
 try:
@@ -94,6 +101,9 @@ from schema_columns import REQUIRED_COLUMNS
 MIN_PSYCOPG_VERSION = (3, 1)
 MIN_POSTGRESQL_VERSION = 15
 
+# Largest handle array sent in a single "handle = ANY(%s)" query
+HANDLE_BATCH_SIZE = 1000
+
 # Import debugging utilities
 try:
     from debug_utils import DebugContext
@@ -288,6 +298,8 @@ class PostgreSQLEnhanced(DBAPI):
 
         * ?use_jsonb=false  (disable JSONB, use blob only)
         * ?pool_size=10     (connection pool size)
+        * ?prepare_threshold=1  (executions before server-side prepare;
+          ``none`` disables it, e.g. behind PgBouncer)
 
         :param directory: Path to database directory or connection string
         :type directory: str
@@ -353,6 +365,10 @@ class PostgreSQLEnhanced(DBAPI):
                     db_name
                 )
             )
+            if config.get("prepare_threshold"):
+                connection_string += "?prepare_threshold=%s" % (
+                    config["prepare_threshold"]
+                )
 
             LOG.info(
                 "Tree name: '%s', Database: '%s', Mode: '%s'",
@@ -493,6 +509,29 @@ class PostgreSQLEnhanced(DBAPI):
         # Set proper version to avoid upgrade prompts
         self._set_metadata("version", "21")
 
+    def _parse_connection_config(self, lines, config=None):
+        """
+        Parse connection_info.txt ``key = value`` lines.
+
+        Blank lines, comments and lines without ``=`` are ignored.
+
+        :param lines: Lines of config text, e.g. an open file or a
+                      ``str.splitlines()`` result
+        :type lines: iterable of str
+        :param config: Existing values to update, or None for a new dict
+        :type config: dict
+        :returns: Dictionary of configuration values
+        :rtype: dict
+        """
+        if config is None:
+            config = {}
+        for line in lines:
+            line = line.strip()
+            if line and not line.startswith("#") and "=" in line:
+                key, value = line.split("=", 1)
+                config[key.strip()] = value.strip()
+        return config
+
     def _read_config_file(self, config_path):
         """
         Read a connection_info.txt file.
@@ -505,11 +544,7 @@ class PostgreSQLEnhanced(DBAPI):
         config = {}
         if os.path.exists(config_path):
             with open(config_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith("#") and "=" in line:
-                        key, value = line.split("=", 1)
-                        config[key.strip()] = value.strip()
+                self._parse_connection_config(f, config)
         return config
 
     def _load_connection_config(self, directory):
@@ -552,11 +587,7 @@ class PostgreSQLEnhanced(DBAPI):
         if os.path.exists(config_path):
             LOG.info("Loading connection config from: %s", config_path)
             with open(config_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith("#") and "=" in line:
-                        key, value = line.split("=", 1)
-                        config[key.strip()] = value.strip()
+                self._parse_connection_config(f, config)
         else:
             LOG.warning(
                 "No connection_info.txt found at %s, using defaults", config_path
@@ -573,11 +604,7 @@ class PostgreSQLEnhanced(DBAPI):
                     LOG.info("Created connection_info.txt template at %s", config_path)
                     # Now read the template we just created
                     with open(config_path, "r", encoding="utf-8") as f:
-                        for line in f:
-                            line = line.strip()
-                            if line and not line.startswith("#") and "=" in line:
-                                key, value = line.split("=", 1)
-                                config[key.strip()] = value.strip()
+                        self._parse_connection_config(f, config)
                     LOG.info("Loaded configuration from template")
                 except (OSError, IOError, shutil.Error) as e:
                     LOG.debug("Could not create config template: %s", e)
@@ -595,17 +622,17 @@ class PostgreSQLEnhanced(DBAPI):
         :raises psycopg.Error: If database creation fails
         """
         try:
-            # Connect to 'postgres' database to check/create the target database
-            temp_conn_string = (
-                "postgresql://%s:%s@%s:%s/postgres" % (
-                    config['user'],
-                    config['password'],
-                    config['host'],
-                    config['port']
-                )
+            # Connect to 'postgres' database to check/create the target database.
+            # Keyword arguments skip URL parsing and need no escaping of
+            # special characters in the password.
+            temp_conn = psycopg.connect(
+                host=config["host"],
+                port=config["port"],
+                user=config["user"],
+                password=config["password"],
+                dbname="postgres",
+                autocommit=True,
             )
-            temp_conn = psycopg.connect(temp_conn_string)
-            temp_conn.autocommit = True
 
             with temp_conn.cursor() as cur:
                 # Check if database exists
@@ -833,6 +860,145 @@ class PostgreSQLEnhanced(DBAPI):
 
         return stats
 
+    # Bulk operations
+    def bulk_add_persons(self, persons, trans, set_gid=True):
+        """
+        Add many new Person objects through a single COPY stream.
+
+        Stores the same rows and does the same bookkeeping as calling
+        :meth:`add_person` for each person (gender statistics, surname
+        list and custom type registries), but the rows are sent with the
+        COPY protocol instead of one INSERT round-trip per person.
+        Secondary columns and backlinks are written with set-based
+        statements afterwards. Every person must be new; a duplicate
+        handle aborts the whole COPY.
+
+        :param persons: Person objects to add
+        :type persons: list
+        :param trans: Transaction object
+        :type trans: DbTxn
+        :param set_gid: Assign the next Gramps ID to persons without one
+        :type set_gid: bool
+        :returns: Handles of the added persons
+        :rtype: list
+        """
+        persons = list(persons)
+        if not persons:
+            return []
+
+        for person in persons:
+            if not person.handle:
+                person.handle = create_id()
+            if not person.gramps_id and set_gid:
+                person.gramps_id = self.find_next_person_gramps_id()
+            if not person.gramps_id:
+                # Same placeholder DbGeneric._add_base uses
+                person.gramps_id = str(random.random())
+
+        self._bulk_insert_objects(persons, PERSON_KEY, "person", trans)
+
+        with self._none_safe_genderstats():
+            for person in persons:
+                self._register_new_person(person, trans)
+
+        return [person.handle for person in persons]
+
+    def get_persons_from_handles(self, handles):
+        """
+        Fetch many Person objects with one query per batch of handles.
+
+        Handles that do not exist are skipped, matching
+        :meth:`get_person_from_handle` returning None for them.
+
+        :param handles: Handles of the persons to retrieve
+        :type handles: list
+        :returns: Person objects in the order of ``handles``
+        :rtype: list
+        """
+        handles = list(handles)
+        found = {}
+        for start in range(0, len(handles), HANDLE_BATCH_SIZE):
+            self.dbapi.execute(
+                "SELECT handle, json_data FROM person WHERE handle = ANY(%s)",
+                [handles[start : start + HANDLE_BATCH_SIZE]],
+            )
+            for handle, data in self.dbapi.fetchall():
+                found[handle] = self.serializer.string_to_object(Person, data)
+        return [found[handle] for handle in handles if handle in found]
+
+    def _bulk_insert_objects(self, objs, obj_key, table, trans):
+        """
+        Insert new primary objects with COPY and update their side tables.
+
+        Mirrors the insert branch of DBAPI._commit_base for a whole list.
+
+        :param objs: New primary objects, all of the same class
+        :type objs: list
+        :param obj_key: Gramps object key (e.g. PERSON_KEY)
+        :type obj_key: int
+        :param table: Unprefixed table name
+        :type table: str
+        :param trans: Transaction object
+        :type trans: DbTxn
+        """
+        table_name = f"{self.table_prefix}{table}"
+        change = int(time.time())
+        for obj in objs:
+            obj.change = change
+
+        # COPY goes straight to psycopg, so use the prefixed table name here
+        cur = self.dbapi.cursor()
+        with cur.copy(
+            sql.SQL("COPY {} (handle, json_data) FROM STDIN").format(
+                sql.Identifier(table_name)
+            )
+        ) as copy:
+            for obj in objs:
+                copy.write_row((obj.handle, self.serializer.object_to_string(obj)))
+
+        handles = [obj.handle for obj in objs]
+
+        # Secondary columns for all rows in one statement
+        if table in REQUIRED_COLUMNS:
+            sets = [
+                f"{col_name} = ({json_path})"
+                for col_name, json_path in REQUIRED_COLUMNS[table].items()
+            ]
+            self.dbapi.execute(
+                f"""
+                UPDATE {table_name}
+                SET {', '.join(sets)}
+                WHERE handle = ANY(%s)
+            """,
+                [handles],
+            )
+
+        # Backlinks: the objects are new, so there is nothing to delete
+        references = []
+        for obj in objs:
+            class_name = obj.__class__.__name__
+            for ref_class_name, ref_handle in set(
+                obj.get_referenced_handles_recursively()
+            ):
+                references.append((obj.handle, class_name, ref_handle, ref_class_name))
+        if references:
+            self.dbapi.cursor().executemany(
+                f"""
+                INSERT INTO {self.table_prefix}reference
+                    (obj_handle, obj_class, ref_handle, ref_class)
+                VALUES (%s, %s, %s, %s)
+            """,
+                references,
+            )
+
+        if not trans.batch:
+            for obj in objs:
+                trans.add(
+                    obj_key, TXNADD, obj.handle, None, self.serializer.object_to_data(obj)
+                )
+            for data in references:
+                trans.add(REFERENCE_KEY, TXNADD, (data[0], data[2]), None, data)
+
     def commit_person(self, person, trans, change_time=None):
         """
         Override commit_person to handle NULL first names gracefully.
@@ -854,6 +1020,18 @@ class PostgreSQLEnhanced(DBAPI):
         LOG.debug("Handle: %s, Gramps ID: %s", person.handle, person.gramps_id)
         LOG.debug("Primary name: %s", person.primary_name)
         LOG.debug("Change time: %s", change_time)
+        with self._none_safe_genderstats():
+            # Call the parent method with the patched function and change_time
+            super().commit_person(person, trans, change_time)
+
+    @staticmethod
+    @contextmanager
+    def _none_safe_genderstats():
+        """
+        Temporarily patch genderstats so a None first name counts as "".
+
+        Used by :meth:`commit_person` and :meth:`bulk_add_persons`.
+        """
         # Import the genderstats module
         from gramps.gen.lib import genderstats
 
@@ -870,12 +1048,62 @@ class PostgreSQLEnhanced(DBAPI):
         # Temporarily patch the function
         genderstats._get_key_from_name = patched_get_key_from_name
         try:
-            # Call the parent method with the patched function and change_time
-            super().commit_person(person, trans, change_time)
+            yield
         finally:
             # Restore the original function
             genderstats._get_key_from_name = original_get_key_from_name
 
+    def _register_new_person(self, person, trans):
+        """
+        Update the in-memory bookkeeping for a newly stored person.
+
+        Mirrors what DbGeneric.commit_person does after inserting a new
+        person, for rows written by :meth:`bulk_add_persons` without it.
+        Call inside :meth:`_none_safe_genderstats`.
+
+        :param person: Person that was just stored
+        :type person: Person
+        :param trans: Transaction object
+        :type trans: DbTxn
+        """
+        self.genderStats.count_person(person)
+        self.add_to_surname_list(person, trans.batch)
+
+        self.individual_attributes.update(
+            [
+                str(attr.type)
+                for attr in person.attribute_list
+                if attr.type.is_custom() and str(attr.type)
+            ]
+        )
+        self.event_role_names.update(
+            [str(eref.role) for eref in person.event_ref_list if eref.role.is_custom()]
+        )
+        self.name_types.update(
+            [
+                str(name.type)
+                for name in ([person.primary_name] + person.alternate_names)
+                if name.type.is_custom()
+            ]
+        )
+        all_surn = list(person.primary_name.get_surname_list())
+        for name in person.alternate_names:
+            all_surn += name.get_surname_list()
+        self.origin_types.update(
+            [str(surn.origintype) for surn in all_surn if surn.origintype.is_custom()]
+        )
+        self.url_types.update(
+            [str(url.type) for url in person.urls if url.type.is_custom()]
+        )
+        attr_list = []
+        for mref in person.media_list:
+            attr_list += [
+                str(attr.type)
+                for attr in mref.attribute_list
+                if attr.type.is_custom() and str(attr.type)
+            ]
+        self.media_attributes.update(attr_list)
+
     def get_person_from_handle(self, handle):
         """
         Override to return None instead of raising exception for nonexistent handles.
@@ -1164,6 +1392,87 @@ class PostgreSQLEnhanced(DBAPI):
                     raise
 
 
+# ------------------------------------------------------------
+#
+# Table prefix patterns
+#
+# ------------------------------------------------------------
+@lru_cache(maxsize=None)
+def _prefix_patterns(table_prefix):
+    """
+    Compile the table-prefixing patterns for a prefix.
+
+    The patterns are built once per prefix and shared by
+    TablePrefixWrapper and CursorPrefixWrapper, rather than being
+    formatted and looked up again for every query.
+
+    :param table_prefix: Prefix to add to table names
+    :type table_prefix: str
+    :returns: (compiled pattern, replacement) pairs, in application order
+    :rtype: list
+    """
+    compiled = []
+    for table in TablePrefixWrapper.PREFIXED_TABLES:
+        # Match table name as whole word (not part of another word)
+        # Handle ALL SQL patterns that DBAPI might generate
+        patterns = [
+            # SELECT patterns - MUST handle queries without keywords before FROM
+            (
+                r"\bSELECT\s+(.+?)\s+FROM\s+(%s)\b" % table,
+                lambda m: f"SELECT {m.group(1)} FROM {table_prefix}{m.group(2)}",
+            ),
+            # Basic patterns with keywords before table name
+            (r"\b(FROM)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": table_prefix}),
+            (r"\b(JOIN)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": table_prefix}),
+            (r"\b(INTO)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": table_prefix}),
+            (r"\b(UPDATE)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": table_prefix}),
+            (r"\b(DELETE\s+FROM)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": table_prefix}),
+            (r"\b(INSERT\s+INTO)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": table_prefix}),
+            (r"\b(ALTER\s+TABLE)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": table_prefix}),
+            (
+                r"\b(DROP\s+TABLE\s+IF\s+EXISTS)\s+(%s)\b" % table,
+                r"\1 %(val)s\2" % {"val": table_prefix},
+            ),
+            (
+                r"\b(CREATE\s+TABLE\s+IF\s+NOT\s+EXISTS)\s+(%s)\b" % table,
+                r"\1 %(val)s\2" % {"val": table_prefix},
+            ),
+            (r"\b(CREATE\s+TABLE)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": table_prefix}),
+            (
+                r"\b(CREATE\s+INDEX\s+\S+\s+ON)\s+(%s)\b" % table,
+                r"\1 %(val)s\2" % {"val": table_prefix},
+            ),
+            (
+                r"\b(CREATE\s+UNIQUE\s+INDEX\s+\S+\s+ON)\s+(%s)\b" % table,
+                r"\1 %(val)s\2" % {"val": table_prefix},
+            ),
+            (
+                r"\b(DROP\s+INDEX\s+IF\s+EXISTS\s+\S+\s+ON)\s+(%s)\b" % table,
+                r"\1 %(val)s\2" % {"val": table_prefix},
+            ),
+            (r"\b(REFERENCES)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": table_prefix}),
+            # EXISTS patterns
+            (r"\b(EXISTS)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": table_prefix}),
+            (
+                r"\bEXISTS\s*\(\s*SELECT\s+.+?\s+FROM\s+(%s)\b" % table,
+                lambda m: m.group(0).replace(
+                    f"FROM {m.group(1)}", f"FROM {table_prefix}{m.group(1)}"
+                ),
+            ),
+            # Table name in WHERE clauses with table.column syntax
+            (r"\b(%s)\.(\w+)" % table, r"%(val)s\1.\2" % {"val": table_prefix}),
+        ]
+
+        for pattern, replacement in patterns:
+            if callable(replacement):
+                # Callables handle complex replacements spanning lines
+                flags = re.IGNORECASE | re.DOTALL
+            else:
+                flags = re.IGNORECASE
+            compiled.append((re.compile(pattern, flags), replacement))
+    return compiled
+
+
 # ------------------------------------------------------------
 #
 # TablePrefixWrapper
@@ -1225,71 +1534,9 @@ class TablePrefixWrapper:
     def _add_table_prefixes(self, query):
         """Add table prefixes to a query."""
         # NO FALLBACK: We must handle ALL query patterns comprehensively
-
         modified = query
-
-        for table in self.PREFIXED_TABLES:
-            # Match table name as whole word (not part of another word)
-            # Handle ALL SQL patterns that DBAPI might generate
-            patterns = [
-                # SELECT patterns - MUST handle queries without keywords before FROM
-                (
-                    r"\bSELECT\s+(.+?)\s+FROM\s+(%s)\b" % table,
-                    lambda m: f"SELECT {m.group(1)} FROM {self._prefix}{m.group(2)}",
-                ),
-                # Basic patterns with keywords before table name
-                (r"\b(FROM)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": self._prefix}),
-                (r"\b(JOIN)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": self._prefix}),
-                (r"\b(INTO)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": self._prefix}),
-                (r"\b(UPDATE)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": self._prefix}),
-                (r"\b(DELETE\s+FROM)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": self._prefix}),
-                (r"\b(INSERT\s+INTO)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": self._prefix}),
-                (r"\b(ALTER\s+TABLE)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": self._prefix}),
-                (
-                    r"\b(DROP\s+TABLE\s+IF\s+EXISTS)\s+(%s)\b" % table,
-                    r"\1 %(val)s\2" % {"val": self._prefix},
-                ),
-                (
-                    r"\b(CREATE\s+TABLE\s+IF\s+NOT\s+EXISTS)\s+(%s)\b" % table,
-                    r"\1 %(val)s\2" % {"val": self._prefix},
-                ),
-                (r"\b(CREATE\s+TABLE)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": self._prefix}),
-                (
-                    r"\b(CREATE\s+INDEX\s+\S+\s+ON)\s+(%s)\b" % table,
-                    r"\1 %(val)s\2" % {"val": self._prefix},
-                ),
-                (
-                    r"\b(CREATE\s+UNIQUE\s+INDEX\s+\S+\s+ON)\s+(%s)\b" % table,
-                    r"\1 %(val)s\2" % {"val": self._prefix},
-                ),
-                (
-                    r"\b(DROP\s+INDEX\s+IF\s+EXISTS\s+\S+\s+ON)\s+(%s)\b" % table,
-                    r"\1 %(val)s\2" % {"val": self._prefix},
-                ),
-                (r"\b(REFERENCES)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": self._prefix}),
-                # EXISTS patterns
-                (r"\b(EXISTS)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": self._prefix}),
-                (
-                    r"\bEXISTS\s*\(\s*SELECT\s+.+?\s+FROM\s+(%s)\b" % table,
-                    lambda m: m.group(0).replace(
-                        f"FROM {m.group(1)}", f"FROM {self._prefix}{m.group(1)}"
-                    ),
-                ),
-                # Table name in WHERE clauses with table.column syntax
-                (r"\b(%s)\.(\w+)" % table, r"%(val)s\1.\2" % {"val": self._prefix}),
-            ]
-
-            for pattern, replacement in patterns:
-                if callable(replacement):
-                    # Use callable for complex replacements
-                    modified = re.sub(
-                        pattern, replacement, modified, flags=re.IGNORECASE | re.DOTALL
-                    )
-                else:
-                    modified = re.sub(
-                        pattern, replacement, modified, flags=re.IGNORECASE
-                    )
-
+        for pattern, replacement in _prefix_patterns(self._prefix):
+            modified = pattern.sub(replacement, modified)
         return modified
 
     def __getattr__(self, name):
@@ -1354,74 +1601,10 @@ class CursorPrefixWrapper:
         :rtype: str
         """
         # NO FALLBACK: We must handle ALL query patterns comprehensively
-
+        # Same compiled patterns as TablePrefixWrapper
         modified = query
-
-        # Use same tables as TablePrefixWrapper
-        prefixed_tables = TablePrefixWrapper.PREFIXED_TABLES
-
-        for table in prefixed_tables:
-            # Match table name as whole word (not part of another word)
-            # Handle ALL SQL patterns that DBAPI might generate
-            patterns = [
-                # SELECT patterns - MUST handle queries without keywords before FROM
-                (
-                    r"\bSELECT\s+(.+?)\s+FROM\s+(%s)\b" % table,
-                    lambda m: f"SELECT {m.group(1)} FROM {self._prefix}{m.group(2)}",
-                ),
-                # Basic patterns with keywords before table name
-                (r"\b(FROM)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": self._prefix}),
-                (r"\b(JOIN)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": self._prefix}),
-                (r"\b(INTO)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": self._prefix}),
-                (r"\b(UPDATE)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": self._prefix}),
-                (r"\b(DELETE\s+FROM)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": self._prefix}),
-                (r"\b(INSERT\s+INTO)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": self._prefix}),
-                (r"\b(ALTER\s+TABLE)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": self._prefix}),
-                (
-                    r"\b(DROP\s+TABLE\s+IF\s+EXISTS)\s+(%s)\b" % table,
-                    r"\1 %(val)s\2" % {"val": self._prefix},
-                ),
-                (
-                    r"\b(CREATE\s+TABLE\s+IF\s+NOT\s+EXISTS)\s+(%s)\b" % table,
-                    r"\1 %(val)s\2" % {"val": self._prefix},
-                ),
-                (r"\b(CREATE\s+TABLE)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": self._prefix}),
-                (
-                    r"\b(CREATE\s+INDEX\s+\S+\s+ON)\s+(%s)\b" % table,
-                    r"\1 %(val)s\2" % {"val": self._prefix},
-                ),
-                (
-                    r"\b(CREATE\s+UNIQUE\s+INDEX\s+\S+\s+ON)\s+(%s)\b" % table,
-                    r"\1 %(val)s\2" % {"val": self._prefix},
-                ),
-                (
-                    r"\b(DROP\s+INDEX\s+IF\s+EXISTS\s+\S+\s+ON)\s+(%s)\b" % table,
-                    r"\1 %(val)s\2" % {"val": self._prefix},
-                ),
-                (r"\b(REFERENCES)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": self._prefix}),
-                # EXISTS patterns
-                (r"\b(EXISTS)\s+(%s)\b" % table, r"\1 %(val)s\2" % {"val": self._prefix}),
-                (
-                    r"\bEXISTS\s*\(\s*SELECT\s+.+?\s+FROM\s+(%s)\b" % table,
-                    lambda m: m.group(0).replace(
-                        f"FROM {m.group(1)}", f"FROM {self._prefix}{m.group(1)}"
-                    ),
-                ),
-                # Table name in WHERE clauses with table.column syntax
-                (r"\b(%s)\.(\w+)" % table, r"%(val)s\1.\2" % {"val": self._prefix}),
-            ]
-
-            for pattern, replacement in patterns:
-                if callable(replacement):
-                    # Use callable for complex replacements
-                    modified = re.sub(
-                        pattern, replacement, modified, flags=re.IGNORECASE | re.DOTALL
-                    )
-                else:
-                    modified = re.sub(
-                        pattern, replacement, modified, flags=re.IGNORECASE
-                    )
-
+        for pattern, replacement in _prefix_patterns(self._prefix):
+            modified = pattern.sub(replacement, modified)
         return modified
 
     def __enter__(self):
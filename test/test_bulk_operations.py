@@ -0,0 +1,292 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2025       Greg Lamberson
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Unit tests for PostgreSQL Enhanced bulk operations.
+"""
+
+# -------------------------------------------------------------------------
+#
+# Standard python modules
+#
+# -------------------------------------------------------------------------
+import unittest
+from unittest.mock import Mock, MagicMock, call, patch
+
+# -------------------------------------------------------------------------
+#
+# PostgreSQL modules
+#
+# -------------------------------------------------------------------------
+from psycopg import sql
+
+# -------------------------------------------------------------------------
+#
+# Gramps modules
+#
+# -------------------------------------------------------------------------
+from gramps.gen.db.dbconst import PERSON_KEY, REFERENCE_KEY, TXNADD
+from gramps.gen.lib import Attribute, AttributeType, Name, Person, Surname
+from gramps.gen.lib.serialize import JSONSerializer
+
+# -------------------------------------------------------------------------
+#
+# PostgreSQL Enhanced modules
+#
+# -------------------------------------------------------------------------
+from .. import postgresqlenhanced
+from ..postgresqlenhanced import PostgreSQLEnhanced, TablePrefixWrapper
+from ..schema_columns import REQUIRED_COLUMNS
+
+
+def create_person(handle=None, gramps_id=None, surname_text="Smith"):
+    """Create a Person with a primary name."""
+    person = Person()
+    if handle:
+        person.set_handle(handle)
+    if gramps_id:
+        person.set_gramps_id(gramps_id)
+    name = Name()
+    name.set_first_name("John")
+    surname = Surname()
+    surname.set_surname(surname_text)
+    name.add_surname(surname)
+    person.set_primary_name(name)
+    return person
+
+
+def normalize(query):
+    """Collapse whitespace so queries compare regardless of layout."""
+    return " ".join(query.split())
+
+
+# -------------------------------------------------------------------------
+#
+# TestBulkAddPersons
+#
+# -------------------------------------------------------------------------
+class TestBulkAddPersons(unittest.TestCase):
+    """Test bulk_add_persons and the COPY insert path."""
+
+    def setUp(self):
+        """Set up a database backed by a mock connection."""
+        self.connection = MagicMock()
+        self.cursor = self.connection.cursor.return_value
+        self.copy = self.cursor.copy.return_value.__enter__.return_value
+        self.trans = Mock(batch=False)
+        self.db = self._create_db(self.connection, "")
+
+    def _create_db(self, dbapi, table_prefix):
+        """Create an unloaded PostgreSQLEnhanced using dbapi."""
+        db = PostgreSQLEnhanced()
+        db.dbapi = dbapi
+        db.table_prefix = table_prefix
+        db.serializer = JSONSerializer()
+        db.find_next_person_gramps_id = Mock(side_effect=["I0001", "I0002"])
+        return db
+
+    def _executed(self, keyword):
+        """Return (query, params) of the execute() call starting with keyword."""
+        for args, _kwargs in self.connection.execute.call_args_list:
+            query = normalize(args[0])
+            if query.startswith(keyword):
+                return query, args[1]
+        self.fail("No %s statement executed" % keyword)
+
+    def test_copy_rows_and_secondary_columns(self):
+        """Test rows go through COPY and secondary columns in one UPDATE."""
+        persons = [create_person("H1", "I0001"), create_person("H2", "I0002")]
+
+        handles = self.db.bulk_add_persons(persons, self.trans)
+
+        self.assertEqual(handles, ["H1", "H2"])
+        self.cursor.copy.assert_called_once_with(
+            sql.SQL("COPY {} (handle, json_data) FROM STDIN").format(
+                sql.Identifier("person")))
+        self.assertEqual(
+            self.copy.write_row.call_args_list,
+            [call((person.handle, self.db.serializer.object_to_string(person)))
+             for person in persons])
+
+        query, params = self._executed("UPDATE person")
+        self.assertEqual(params, [["H1", "H2"]])
+        for col_name, json_path in REQUIRED_COLUMNS["person"].items():
+            self.assertIn("%s = (%s)" % (col_name, json_path), query)
+
+    def test_references_and_undo_records(self):
+        """Test backlinks are inserted and every row is recorded for undo."""
+        person = create_person("H1", "I0001")
+        person.add_parent_family_handle("F1")
+
+        self.db.bulk_add_persons([person], self.trans)
+
+        self.cursor.executemany.assert_called_once()
+        query, rows = self.cursor.executemany.call_args[0]
+        self.assertTrue(normalize(query).startswith("INSERT INTO reference"))
+        self.assertEqual(rows, [("H1", "Person", "F1", "Family")])
+        self.assertEqual(
+            self.trans.add.call_args_list,
+            [call(PERSON_KEY, TXNADD, "H1", None,
+                  self.db.serializer.object_to_data(person)),
+             call(REFERENCE_KEY, TXNADD, ("H1", "F1"), None,
+                  ("H1", "Person", "F1", "Family"))])
+
+    def test_batch_transaction_skips_undo(self):
+        """Test a batch transaction records no undo data."""
+        person = create_person("H1", "I0001")
+        person.add_parent_family_handle("F1")
+        self.trans.batch = True
+
+        self.db.bulk_add_persons([person], self.trans)
+
+        self.cursor.executemany.assert_called_once()
+        self.trans.add.assert_not_called()
+
+    def test_no_references(self):
+        """Test persons without references skip the backlink insert."""
+        self.db.bulk_add_persons([create_person("H1", "I0001")], self.trans)
+
+        self.cursor.executemany.assert_not_called()
+
+    def test_handle_and_gramps_id_defaults(self):
+        """Test missing handles and Gramps IDs are filled in like add_person."""
+        first, second = create_person(), create_person()
+
+        self.db.bulk_add_persons([first, second], self.trans)
+
+        self.assertTrue(first.handle)
+        self.assertTrue(second.handle)
+        self.assertNotEqual(first.handle, second.handle)
+        self.assertEqual(
+            (first.gramps_id, second.gramps_id), ("I0001", "I0002"))
+
+    def test_placeholder_gramps_id_without_set_gid(self):
+        """Test set_gid=False leaves a placeholder ID, as add_person does."""
+        person = create_person("H1")
+
+        self.db.bulk_add_persons([person], self.trans, set_gid=False)
+
+        self.db.find_next_person_gramps_id.assert_not_called()
+        self.assertTrue(person.gramps_id)
+        float(person.gramps_id)
+
+    def test_bookkeeping(self):
+        """Test surname list, gender stats and custom types are updated."""
+        person = create_person("H1", "I0001", surname_text="Jones")
+        attribute = Attribute()
+        attribute.set_type(AttributeType("Blood type"))
+        attribute.set_value("O+")
+        person.add_attribute(attribute)
+
+        self.db.bulk_add_persons([person], self.trans)
+
+        self.assertIn("Jones", self.db.surname_list)
+        self.assertIn("Blood type", self.db.individual_attributes)
+        self.assertEqual(
+            self.db.genderStats.name_stats("John"), (0, 0, 1))
+
+    def test_prefixed_tables_in_monolithic_mode(self):
+        """Test every statement targets the tree's prefixed tables once."""
+        prefix = "tree_smith_"
+        self.db = self._create_db(
+            TablePrefixWrapper(self.connection, prefix), prefix)
+        person = create_person("H1", "I0001")
+        person.add_parent_family_handle("F1")
+
+        self.db.bulk_add_persons([person], self.trans)
+
+        self.cursor.copy.assert_called_once_with(
+            sql.SQL("COPY {} (handle, json_data) FROM STDIN").format(
+                sql.Identifier("tree_smith_person")))
+        query, _params = self._executed("UPDATE tree_smith_person")
+        self.assertNotIn("tree_smith_tree_smith_", query)
+        query = normalize(self.cursor.executemany.call_args[0][0])
+        self.assertTrue(query.startswith("INSERT INTO tree_smith_reference"))
+
+
+# -------------------------------------------------------------------------
+#
+# TestGetPersonsFromHandles
+#
+# -------------------------------------------------------------------------
+class TestGetPersonsFromHandles(unittest.TestCase):
+    """Test get_persons_from_handles."""
+
+    def setUp(self):
+        """Set up a database backed by a mock connection."""
+        self.connection = MagicMock()
+        self.db = PostgreSQLEnhanced()
+        self.db.dbapi = self.connection
+        self.db.serializer = JSONSerializer()
+
+    def _rows(self, *handles):
+        """Return (handle, json_data) rows for new persons."""
+        return [
+            (handle, self.db.serializer.object_to_string(
+                create_person(handle, "I" + handle)))
+            for handle in handles
+        ]
+
+    def test_batches_handles(self):
+        """Test one query is run per HANDLE_BATCH_SIZE handles."""
+        handles = ["A", "B", "C", "D", "E"]
+        self.connection.fetchall.side_effect = [
+            self._rows("A", "B"), self._rows("C", "D"), self._rows("E")]
+
+        with patch.object(postgresqlenhanced, "HANDLE_BATCH_SIZE", 2):
+            persons = self.db.get_persons_from_handles(handles)
+
+        self.assertEqual(
+            [args[1] for args, _kwargs in
+             self.connection.execute.call_args_list],
+            [[["A", "B"]], [["C", "D"]], [["E"]]])
+        self.assertEqual([person.handle for person in persons], handles)
+
+    def test_order_and_missing_handles(self):
+        """Test results follow the requested order and skip missing ones."""
+        self.connection.fetchall.return_value = self._rows("A", "B", "C")
+
+        persons = self.db.get_persons_from_handles(["C", "X", "A", "B"])
+
+        self.assertEqual(
+            [person.handle for person in persons], ["C", "A", "B"])
+        self.assertEqual(persons[0].gramps_id, "IC")
+        self.assertIsInstance(persons[0], Person)
+
+    def test_empty_handles(self):
+        """Test no query is run for an empty handle list."""
+        self.assertEqual(self.db.get_persons_from_handles([]), [])
+        self.connection.execute.assert_not_called()
+
+    def test_prefixed_table_in_monolithic_mode(self):
+        """Test the query is rewritten to the tree's person table."""
+        self.db.dbapi = TablePrefixWrapper(self.connection, "tree_smith_")
+        self.connection.fetchall.return_value = self._rows("A")
+
+        persons = self.db.get_persons_from_handles(["A"])
+
+        self.assertEqual(len(persons), 1)
+        self.connection.execute.assert_called_once_with(
+            "SELECT handle, json_data FROM tree_smith_person "
+            "WHERE handle = ANY(%s)", [["A"]])
+
+
+if __name__ == '__main__':
+    unittest.main()
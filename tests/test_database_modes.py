@@ -45,13 +45,15 @@ database_mode = separate
     created_dbs = []
 
     try:
-        # Connect to postgres database for admin operations
+        # Connect to postgres database for admin operations; the existence
+        # check repeats per tree, so prepare it on first use
         admin_conn = psycopg.connect(
             host=DB_CONFIG["host"],
             port=DB_CONFIG["port"],
             user=DB_CONFIG["user"],
             password=DB_CONFIG["password"],
             dbname="postgres",
+            prepare_threshold=0,
         )
         admin_conn.autocommit = True
 
@@ -178,13 +180,15 @@ shared_database_name = gramps_monolithic_test
         admin_conn.autocommit = True
 
         with admin_conn.cursor() as cur:
-            cur.execute("SELECT 1 FROM pg_database WHERE datname = %s", [shared_db])
-
-            if not cur.fetchone():
-                print(f"  Creating shared database: {shared_db}")
+            # Create directly and treat "already exists" as success: one
+            # round trip, and no window between the check and the create
+            try:
                 cur.execute(
                     sql.SQL("CREATE DATABASE {}").format(sql.Identifier(shared_db))
                 )
+                print(f"  Created shared database: {shared_db}")
+            except psycopg.errors.DuplicateDatabase:
+                print(f"  Shared database already exists: {shared_db}")
 
         admin_conn.close()
 
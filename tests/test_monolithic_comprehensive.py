@@ -12,7 +12,6 @@ import tempfile
 import shutil
 import time
 import threading
-import subprocess
 import json
 from datetime import datetime
 import psycopg
@@ -38,8 +37,14 @@ DB_CONFIG = {
     "user": "genealogy_user",
     "password": "GenealogyData2025",
     "shared_database": "gramps_monolithic_test",
+    # DBAPI repeats the same statements for every object; prepare them
+    # server-side after the first execution
+    "prepare_threshold": 1,
 }
 
+# First server version supporting DROP DATABASE ... WITH (FORCE)
+FORCE_DROP_MIN_VERSION = 130000
+
 # Test data
 TEST_TREES = ["smith_family", "jones_research", "wilson_archive"]
 
@@ -71,6 +76,26 @@ TEST_PERSON_DATA = {
 }
 
 
+def drop_database(cur, db_name):
+    """Drop a database if it exists, disconnecting any other sessions."""
+    if cur.connection.info.server_version >= FORCE_DROP_MIN_VERSION:
+        # One statement terminates the sessions and drops the database
+        cur.execute(
+            sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(sql.Identifier(db_name))
+        )
+        return
+
+    # Force disconnect existing connections
+    cur.execute("""
+        SELECT pg_terminate_backend(pg_stat_activity.pid)
+        FROM pg_stat_activity
+        WHERE pg_stat_activity.datname = %s
+          AND pid <> pg_backend_pid()
+    """, [db_name])
+
+    cur.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(db_name)))
+
+
 def create_test_person(handle, gramps_id, first_name, surname_text):
     """Helper to create a Person object for testing."""
     person = Person()
@@ -97,6 +122,22 @@ class MonolithicModeTests:
         self.db_instances = {}
         self.shared_db = DB_CONFIG["shared_database"]
         self.results = {"passed": 0, "failed": 0, "errors": []}
+        # Kept open for the whole run instead of reconnecting per phase
+        self.admin_conn = None
+        self.check_conn = None
+
+    def get_check_conn(self):
+        """Return the shared-database connection used for SQL-level checks."""
+        if self.check_conn is None:
+            self.check_conn = psycopg.connect(
+                host=DB_CONFIG["host"],
+                port=DB_CONFIG["port"],
+                user=DB_CONFIG["user"],
+                password=DB_CONFIG["password"],
+                dbname=self.shared_db,
+                autocommit=True,
+            )
+        return self.check_conn
 
     def setup(self):
         """Set up test environment."""
@@ -104,22 +145,18 @@ class MonolithicModeTests:
 
         # Create shared database
         try:
-            admin_conn = psycopg.connect(
+            self.admin_conn = psycopg.connect(
                 host=DB_CONFIG["host"],
                 port=DB_CONFIG["port"],
                 user=DB_CONFIG["user"],
                 password=DB_CONFIG["password"],
                 dbname="postgres",
             )
-            admin_conn.autocommit = True
+            self.admin_conn.autocommit = True
 
-            with admin_conn.cursor() as cur:
+            with self.admin_conn.cursor() as cur:
                 # Drop if exists
-                cur.execute(
-                    sql.SQL("DROP DATABASE IF EXISTS {}").format(
-                        sql.Identifier(self.shared_db)
-                    )
-                )
+                drop_database(cur, self.shared_db)
 
                 # Create fresh
                 cur.execute(
@@ -127,8 +164,6 @@ class MonolithicModeTests:
                 )
                 print(f"✓ Created shared database: {self.shared_db}")
 
-            admin_conn.close()
-
         except Exception as e:
             print(f"✗ Failed to create database: {e}")
             raise
@@ -151,6 +186,7 @@ user = {DB_CONFIG['user']}
 password = {DB_CONFIG['password']}
 database_mode = monolithic
 shared_database_name = {self.shared_db}
+prepare_threshold = {DB_CONFIG['prepare_threshold']}
 """
             )
 
@@ -180,15 +216,7 @@ shared_database_name = {self.shared_db}
 
                 prefix = re.sub(r"[^a-zA-Z0-9_]", "_", tree_name) + "_"
 
-                conn = psycopg.connect(
-                    host=DB_CONFIG["host"],
-                    port=DB_CONFIG["port"],
-                    user=DB_CONFIG["user"],
-                    password=DB_CONFIG["password"],
-                    dbname=self.shared_db,
-                )
-
-                with conn.cursor() as cur:
+                with self.get_check_conn().cursor() as cur:
                     # Check for prefixed tables
                     cur.execute(
                         """
@@ -229,8 +257,6 @@ shared_database_name = {self.shared_db}
 
                     print(f"  ✓ Created {len(tables)} tables with prefix '{prefix}'")
 
-                conn.close()
-
             self.results["passed"] += 1
             print("\n✓ All trees created successfully in monolithic mode")
 
@@ -283,33 +309,41 @@ shared_database_name = {self.shared_db}
             for tree_name in TEST_TREES:
                 db = self.db_instances[tree_name]
 
-                # Get all people in this tree
-                people = list(db.iter_people())
+                # Count with SQL; only the tree's own person is deserialized
+                count = db.get_number_of_people()
 
-                if len(people) != 1:
-                    raise Exception(f"{tree_name} has {len(people)} people, expected 1")
+                if count != 1:
+                    raise Exception(f"{tree_name} has {count} people, expected 1")
 
-                person = people[0]
+                handle = db.get_person_handles()[0]
                 expected = test_data[tree_name]
 
-                if person.handle != expected.handle:
-                    raise Exception(f"{tree_name} has wrong person: {person.handle}")
+                if handle != expected.handle:
+                    raise Exception(f"{tree_name} has wrong person: {handle}")
+
+                # Round-trip the stored person and check what was read back
+                stored = db.get_person_from_handle(handle)
+                if stored is None:
+                    raise Exception(f"{tree_name} could not load person {handle}")
+
+                stored_name = stored.get_primary_name()
+                expected_name = expected.get_primary_name()
+                if (stored_name.get_first_name(), stored_name.get_surname()) != (
+                    expected_name.get_first_name(),
+                    expected_name.get_surname(),
+                ):
+                    raise Exception(
+                        f"{tree_name} person has wrong name: "
+                        f"{stored_name.get_first_name()} {stored_name.get_surname()}"
+                    )
 
                 print(
-                    f"  ✓ {tree_name}: Found only its own person ({person.get_primary_name().get_first_name()})"
+                    f"  ✓ {tree_name}: Found only its own person ({stored_name.get_first_name()})"
                 )
 
             # Also verify at SQL level
             print("\nVerifying at SQL level:")
-            conn = psycopg.connect(
-                host=DB_CONFIG["host"],
-                port=DB_CONFIG["port"],
-                user=DB_CONFIG["user"],
-                password=DB_CONFIG["password"],
-                dbname=self.shared_db,
-            )
-
-            with conn.cursor() as cur:
+            with self.get_check_conn().cursor() as cur:
                 for tree_name in TEST_TREES:
                     # Use same prefix generation as in postgresqlenhanced.py
                     import re
@@ -328,8 +362,6 @@ shared_database_name = {self.shared_db}
 
                     print(f"  ✓ {prefix}person table has exactly 1 row")
 
-            conn.close()
-
             self.results["passed"] += 1
             print("\n✓ Data isolation verified - no cross-contamination between trees")
 
@@ -658,14 +690,15 @@ shared_database_name = {self.shared_db}
             print("\nTesting monolithic mode performance:")
             db = self.db_instances[TEST_TREES[0]]
 
-            # Add 100 people
+            # Add 100 people in one transaction, so the timing reflects the
+            # insert path rather than a commit per person
+            people = [
+                create_test_person(f"PERF_{i:04d}", f"P{i:04d}", f"Perf{i}", "Test")
+                for i in range(100)
+            ]
             start = time.time()
-            for i in range(100):
-                person = create_test_person(
-                    f"PERF_{i:04d}", f"P{i:04d}", f"Perf{i}", "Test"
-                )
-
-                with DbTxn("Add", db) as trans:
+            with DbTxn("Add 100 people", db) as trans:
+                for person in people:
                     db.add_person(person, trans)
 
             results["monolithic"]["add_100"] = time.time() - start
@@ -711,6 +744,10 @@ shared_database_name = {self.shared_db}
             except:
                 pass
 
+        if self.check_conn is not None:
+            self.check_conn.close()
+            self.check_conn = None
+
         # Remove temp directories
         for temp_dir in self.temp_dirs:
             try:
@@ -719,32 +756,21 @@ shared_database_name = {self.shared_db}
                 pass
 
         # Drop test database (unless asked to keep it)
-        if not keep_database:
+        if not keep_database and self.admin_conn is not None:
             try:
-                admin_conn = psycopg.connect(
-                    host=DB_CONFIG["host"],
-                    port=DB_CONFIG["port"],
-                    user=DB_CONFIG["user"],
-                    password=DB_CONFIG["password"],
-                    dbname="postgres",
-                )
-                admin_conn.autocommit = True
-
-                with admin_conn.cursor() as cur:
-                    cur.execute(
-                        sql.SQL("DROP DATABASE IF EXISTS {}").format(
-                            sql.Identifier(self.shared_db)
-                        )
-                    )
+                with self.admin_conn.cursor() as cur:
+                    drop_database(cur, self.shared_db)
                     print(f"  ✓ Dropped test database: {self.shared_db}")
 
-                admin_conn.close()
-
             except Exception as e:
                 print(f"  ✗ Failed to drop database: {e}")
-        else:
+        elif keep_database:
             print(f"  ℹ Keeping test database: {self.shared_db} for verification")
 
+        if self.admin_conn is not None:
+            self.admin_conn.close()
+            self.admin_conn = None
+
     def run_all_tests(self):
         """Run all monolithic mode tests."""
         print("=" * 70)
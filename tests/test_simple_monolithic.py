@@ -12,45 +12,65 @@ DB_CONFIG = {
     "port": 5432,
     "user": "genealogy_user",
     "password": "GenealogyData2025",
+    # Fail fast when the test server is unreachable
+    "connect_timeout": 5,
 }
 
+# First server version supporting DROP DATABASE ... WITH (FORCE)
+FORCE_DROP_MIN_VERSION = 130000
+
+def drop_database(cur, db_name):
+    """Drop a database if it exists, disconnecting any other sessions."""
+    if cur.connection.info.server_version >= FORCE_DROP_MIN_VERSION:
+        # One statement terminates the sessions and drops the database
+        cur.execute(
+            sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(sql.Identifier(db_name))
+        )
+        return
+    
+    # Force disconnect existing connections
+    cur.execute("""
+        SELECT pg_terminate_backend(pg_stat_activity.pid)
+        FROM pg_stat_activity
+        WHERE pg_stat_activity.datname = %s
+          AND pid <> pg_backend_pid()
+    """, [db_name])
+    
+    cur.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(db_name)))
+
 def test_quoted_table_names():
     """Test how PostgreSQL handles quoted table names."""
     
-    # Create test database
+    # Create test database; the admin connection is kept for teardown
     test_db = "test_quotes"
     admin_conn = psycopg.connect(
         host=DB_CONFIG["host"],
         port=DB_CONFIG["port"],
         user=DB_CONFIG["user"],
         password=DB_CONFIG["password"],
+        connect_timeout=DB_CONFIG["connect_timeout"],
         dbname="postgres",
     )
     admin_conn.autocommit = True
-    
-    with admin_conn.cursor() as cur:
-        # Force disconnect existing connections
-        cur.execute("""
-            SELECT pg_terminate_backend(pg_stat_activity.pid)
-            FROM pg_stat_activity
-            WHERE pg_stat_activity.datname = %s
-              AND pid <> pg_backend_pid()
-        """, [test_db])
-        
-        cur.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(test_db)))
-        cur.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(test_db)))
-    admin_conn.close()
-    
-    # Connect to test database
-    conn = psycopg.connect(
-        host=DB_CONFIG["host"],
-        port=DB_CONFIG["port"],
-        user=DB_CONFIG["user"],
-        password=DB_CONFIG["password"],
-        dbname=test_db,
-    )
+    conn = None
     
     try:
+        with admin_conn.cursor() as cur:
+            drop_database(cur, test_db)
+            cur.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(test_db)))
+        
+        # Connect to test database
+        conn = psycopg.connect(
+            host=DB_CONFIG["host"],
+            port=DB_CONFIG["port"],
+            user=DB_CONFIG["user"],
+            password=DB_CONFIG["password"],
+            connect_timeout=DB_CONFIG["connect_timeout"],
+            dbname=test_db,
+            # Throwaway database: commits need not wait for the WAL flush
+            options="-c synchronous_commit=off",
+        )
+        
         with conn.cursor() as cur:
             # Test 1: Create table with quoted name
             print("Test 1: Creating table with quoted name")
@@ -108,28 +128,12 @@ def test_quoted_table_names():
         traceback.print_exc()
     
     finally:
-        conn.close()
+        if conn is not None:
+            conn.close()
         
         # Drop test database
-        admin_conn = psycopg.connect(
-            host=DB_CONFIG["host"],
-            port=DB_CONFIG["port"],
-            user=DB_CONFIG["user"],
-            password=DB_CONFIG["password"],
-            dbname="postgres",
-        )
-        admin_conn.autocommit = True
-        
         with admin_conn.cursor() as cur:
-            # Force disconnect
-            cur.execute("""
-                SELECT pg_terminate_backend(pg_stat_activity.pid)
-                FROM pg_stat_activity
-                WHERE pg_stat_activity.datname = %s
-                  AND pid <> pg_backend_pid()
-            """, [test_db])
-            
-            cur.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(test_db)))
+            drop_database(cur, test_db)
         admin_conn.close()
         print(f"\n✓ Cleaned up test database: {test_db}")
 
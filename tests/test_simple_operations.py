@@ -10,7 +10,7 @@ import tempfile
 import shutil
 import psycopg
 from psycopg import sql
-from psycopg.types.json import Json
+from psycopg.types.json import JsonbDumper
 
 # Add plugin directory to Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -21,35 +21,59 @@ DB_CONFIG = {
     "port": 5432,
     "user": "genealogy_user",
     "password": "GenealogyData2025",
+    # Fail fast when the test server is unreachable
+    "connect_timeout": 5,
 }
 
+# First server version supporting DROP DATABASE ... WITH (FORCE)
+FORCE_DROP_MIN_VERSION = 130000
+
+def drop_database(cur, db_name):
+    """Drop a database if it exists, disconnecting any other sessions."""
+    if cur.connection.info.server_version >= FORCE_DROP_MIN_VERSION:
+        # One statement terminates the sessions and drops the database
+        cur.execute(
+            sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(sql.Identifier(db_name))
+        )
+        return
+    
+    # Force disconnect existing connections
+    cur.execute("""
+        SELECT pg_terminate_backend(pg_stat_activity.pid)
+        FROM pg_stat_activity
+        WHERE pg_stat_activity.datname = %s
+          AND pid <> pg_backend_pid()
+    """, [db_name])
+    
+    cur.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(db_name)))
+
 def test_direct_sql_operations():
     """Test direct SQL operations to verify database connectivity."""
     print("=== Testing Direct SQL Operations ===\n")
     
     test_db = "gramps_test_sql_ops"
+    admin_conn = None
     
     try:
-        # Create test database
+        # Create test database; the admin connection stays open for cleanup
         print(f"1. Creating test database {test_db}...")
         admin_conn = psycopg.connect(
             host=DB_CONFIG["host"],
             port=DB_CONFIG["port"],
             user=DB_CONFIG["user"],
             password=DB_CONFIG["password"],
+            connect_timeout=DB_CONFIG["connect_timeout"],
             dbname="postgres",
             autocommit=True
         )
         
         with admin_conn.cursor() as cur:
             # Drop if exists
-            cur.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(test_db)))
+            drop_database(cur, test_db)
             # Create new
             cur.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(test_db)))
             print("   ✓ Database created")
         
-        admin_conn.close()
-        
         # Connect to test database
         print(f"\n2. Connecting to {test_db}...")
         conn = psycopg.connect(
@@ -57,86 +81,99 @@ def test_direct_sql_operations():
             port=DB_CONFIG["port"],
             user=DB_CONFIG["user"],
             password=DB_CONFIG["password"],
-            dbname=test_db
+            connect_timeout=DB_CONFIG["connect_timeout"],
+            dbname=test_db,
+            # Throwaway database: commits need not wait for the WAL flush
+            options="-c synchronous_commit=off"
         )
+        # Adapt plain dicts as jsonb on this connection, so rows can pass
+        # them without a Json() wrapper
+        conn.adapters.register_dumper(dict, JsonbDumper)
         print("   ✓ Connected")
         
-        # Create a simple table
-        print("\n3. Creating test table...")
-        with conn.cursor() as cur:
-            cur.execute("""
-                CREATE TABLE test_person (
-                    handle TEXT PRIMARY KEY,
-                    json_data JSONB,
-                    gramps_id TEXT,
-                    given_name TEXT,
-                    surname TEXT
-                )
-            """)
-            conn.commit()
-            print("   ✓ Table created")
-        
-        # Insert test data
-        print("\n4. Inserting test data...")
+        # Steps 3-7 go out as one pipeline. Each SELECT gets its own cursor
+        # so its rows can be read after the final commit syncs the batch.
         test_data = [
             ("HANDLE001", {"name": "John Smith"}, "I0001", "John", "Smith"),
             ("HANDLE002", {"name": "Jane Doe"}, "I0002", "Jane", "Doe"),
             ("HANDLE003", {"name": "Bob Wilson"}, "I0003", "Bob", "Wilson")
         ]
+        prefix = "tree1_"
+        prefixed_table = sql.Identifier(f"{prefix}person")
+        create_prefixed_sql = sql.SQL("""
+            CREATE TABLE {} (
+                handle TEXT PRIMARY KEY,
+                json_data JSONB
+            )
+        """).format(prefixed_table)
+        insert_prefixed_sql = sql.SQL(
+            "INSERT INTO {} (handle, json_data) VALUES (%s, %s)"
+        ).format(prefixed_table)
+        select_prefixed_sql = sql.SQL("SELECT handle FROM {}").format(prefixed_table)
         
-        with conn.cursor() as cur:
-            for handle, json_data, gramps_id, given, surname in test_data:
-                cur.execute(
-                    """
-                    INSERT INTO test_person (handle, json_data, gramps_id, given_name, surname)
-                    VALUES (%s, %s, %s, %s, %s)
-                    """,
-                    (handle, Json(json_data), gramps_id, given, surname)
-                )
-            conn.commit()
+        # The result cursors stay open until their rows are read; the
+        # with block closes them even if a step fails
+        with conn.cursor() as rows_cur, conn.cursor() as jsonb_cur, \
+                conn.cursor() as prefix_cur:
+            with conn.pipeline():
+                with conn.cursor() as cur:
+                    # Create a simple table
+                    cur.execute("""
+                        CREATE TABLE test_person (
+                            handle TEXT PRIMARY KEY,
+                            json_data JSONB,
+                            gramps_id TEXT,
+                            given_name TEXT,
+                            surname TEXT
+                        )
+                    """)
+                    
+                    # Insert test data
+                    cur.executemany(
+                        """
+                        INSERT INTO test_person (handle, json_data, gramps_id, given_name, surname)
+                        VALUES (%s, %s, %s, %s, %s)
+                        """,
+                        test_data
+                    )
+                
+                # Query data back
+                rows_cur.execute("SELECT handle, given_name, surname FROM test_person ORDER BY handle")
+                
+                # Test JSONB query
+                jsonb_cur.execute("SELECT handle FROM test_person WHERE json_data->>'name' LIKE '%Smith%'")
+                
+                # Test table prefix simulation
+                with conn.cursor() as cur:
+                    # Create prefixed table
+                    cur.execute(create_prefixed_sql)
+                    
+                    # Insert into prefixed table
+                    cur.execute(insert_prefixed_sql, ("PREFIX001", {"test": "data"}))
+                
+                # Query from prefixed table
+                prefix_cur.execute(select_prefixed_sql)
+                
+                conn.commit()
+            
+            print("\n3. Creating test table...")
+            print("   ✓ Table created")
+            
+            print("\n4. Inserting test data...")
             print(f"   ✓ Inserted {len(test_data)} records")
-        
-        # Query data back
-        print("\n5. Querying data...")
-        with conn.cursor() as cur:
-            cur.execute("SELECT handle, given_name, surname FROM test_person ORDER BY handle")
-            rows = cur.fetchall()
+            
+            print("\n5. Querying data...")
+            rows = rows_cur.fetchall()
             print(f"   ✓ Found {len(rows)} records:")
             for row in rows:
                 print(f"     - {row[0]}: {row[1]} {row[2]}")
-        
-        # Test JSONB query
-        print("\n6. Testing JSONB query...")
-        with conn.cursor() as cur:
-            cur.execute("SELECT handle FROM test_person WHERE json_data->>'name' LIKE '%Smith%'")
-            rows = cur.fetchall()
-            print(f"   ✓ Found {len(rows)} records with 'Smith' in JSON data")
-        
-        # Test table prefix simulation
-        print("\n7. Testing table prefix simulation...")
-        prefix = "tree1_"
-        
-        with conn.cursor() as cur:
-            # Create prefixed table
-            cur.execute(sql.SQL("""
-                CREATE TABLE {} (
-                    handle TEXT PRIMARY KEY,
-                    json_data JSONB
-                )
-            """).format(sql.Identifier(f"{prefix}person")))
             
-            # Insert into prefixed table
-            cur.execute(
-                sql.SQL("INSERT INTO {} (handle, json_data) VALUES (%s, %s)").format(
-                    sql.Identifier(f"{prefix}person")
-                ),
-                ("PREFIX001", Json({"test": "data"}))
-            )
-            conn.commit()
+            print("\n6. Testing JSONB query...")
+            rows = jsonb_cur.fetchall()
+            print(f"   ✓ Found {len(rows)} records with 'Smith' in JSON data")
             
-            # Query from prefixed table
-            cur.execute(sql.SQL("SELECT handle FROM {}").format(sql.Identifier(f"{prefix}person")))
-            rows = cur.fetchall()
+            print("\n7. Testing table prefix simulation...")
+            rows = prefix_cur.fetchall()
             print(f"   ✓ Prefixed table {prefix}person works correctly")
         
         # Clean up connection
@@ -144,18 +181,8 @@ def test_direct_sql_operations():
         
         # Drop test database
         print("\n8. Cleaning up...")
-        admin_conn = psycopg.connect(
-            host=DB_CONFIG["host"],
-            port=DB_CONFIG["port"],
-            user=DB_CONFIG["user"],
-            password=DB_CONFIG["password"],
-            dbname="postgres",
-            autocommit=True
-        )
-        
         with admin_conn.cursor() as cur:
-            cur.execute(sql.SQL("DROP DATABASE {}").format(sql.Identifier(test_db)))
-        admin_conn.close()
+            drop_database(cur, test_db)
         print("   ✓ Test database dropped")
         
         print("\n✅ All direct SQL operations successful!")
@@ -168,21 +195,17 @@ def test_direct_sql_operations():
         
         # Try to clean up
         try:
-            admin_conn = psycopg.connect(
-                host=DB_CONFIG["host"],
-                port=DB_CONFIG["port"],
-                user=DB_CONFIG["user"],
-                password=DB_CONFIG["password"],
-                dbname="postgres",
-                autocommit=True
-            )
-            with admin_conn.cursor() as cur:
-                cur.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(test_db)))
-            admin_conn.close()
+            if admin_conn is not None:
+                with admin_conn.cursor() as cur:
+                    drop_database(cur, test_db)
         except:
             pass
         
         return False
+    
+    finally:
+        if admin_conn is not None:
+            admin_conn.close()
 
 def test_plugin_config_loading():
     """Test that the plugin can load configuration correctly."""
@@ -192,8 +215,12 @@ def test_plugin_config_loading():
     import mock_gramps
     from postgresqlenhanced import PostgreSQLEnhanced
     
-    # Create temp directory
-    temp_dir = tempfile.mkdtemp(prefix="test_config_")
+    # Create temp directory, on tmpfs where available to keep the
+    # config round trip off the disk
+    temp_dir = tempfile.mkdtemp(
+        prefix="test_config_",
+        dir="/dev/shm" if os.path.isdir("/dev/shm") else None
+    )
     tree_name = "config_test"
     tree_path = os.path.join(temp_dir, tree_name)
     os.makedirs(tree_path, exist_ok=True)
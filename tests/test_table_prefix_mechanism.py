@@ -23,6 +23,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 import mock_gramps
 
 from connection import PostgreSQLConnection
+from postgresqlenhanced import TablePrefixWrapper
 from schema import PostgreSQLSchema
 
 # Database configuration
@@ -34,97 +35,55 @@ DB_CONFIG = {
     "test_db": "gramps_prefix_test",
 }
 
+CONN_STRING = (
+    f"postgresql://{DB_CONFIG['user']}:{DB_CONFIG['password']}"
+    f"@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['test_db']}"
+)
 
-def test_table_prefix_creation():
-    """Test that tables are created with correct prefixes."""
-    print("\n=== Testing Table Prefix Creation ===")
+# First server version supporting DROP DATABASE ... WITH (FORCE)
+FORCE_DROP_MIN_VERSION = 130000
 
-    # Create test database
-    admin_conn = psycopg.connect(
-        host=DB_CONFIG["host"],
-        port=DB_CONFIG["port"],
-        user=DB_CONFIG["user"],
-        password=DB_CONFIG["password"],
-        dbname="postgres",
-    )
-    admin_conn.autocommit = True
+# Tables whose prefixed copies the schema creation test looks for
+SCHEMA_CHECK_TABLES = ("person", "family", "event", "place", "source")
 
-    with admin_conn.cursor() as cur:
+# Finds which of the expected prefixed tables exist, for all trees at once
+PREFIX_TABLES_SQL = """
+    SELECT tablename
+    FROM pg_tables
+    WHERE schemaname = 'public'
+    AND tablename = ANY(%s)
+"""
+
+# Compiled once; the tests apply them inside their loops
+SANITIZE_RE = re.compile(r"[^a-zA-Z0-9_]")
+VALID_PREFIX_RE = re.compile(r"^[a-zA-Z0-9_]+_$")
+
+
+def drop_database(cur, db_name):
+    """Drop a database if it exists, disconnecting any other sessions."""
+    if cur.connection.info.server_version >= FORCE_DROP_MIN_VERSION:
+        # One statement terminates the sessions and drops the database
         cur.execute(
-            sql.SQL("DROP DATABASE IF EXISTS {}").format(
-                sql.Identifier(DB_CONFIG["test_db"])
-            )
-        )
-        cur.execute(
-            sql.SQL("CREATE DATABASE {}").format(sql.Identifier(DB_CONFIG["test_db"]))
+            sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(sql.Identifier(db_name))
         )
+        return
 
-    admin_conn.close()
+    # Force disconnect existing connections
+    cur.execute("""
+        SELECT pg_terminate_backend(pg_stat_activity.pid)
+        FROM pg_stat_activity
+        WHERE pg_stat_activity.datname = %s
+          AND pid <> pg_backend_pid()
+    """, [db_name])
 
-    # Test different tree names and their expected prefixes
-    test_cases = [
-        ("smith_family", "smith_family_"),
-        ("jones-research", "jones_research_"),
-        ("wilson.archive", "wilson_archive_"),
-        ("test 123", "test_123_"),
-        ("O'Brien_Family", "O_Brien_Family_"),
-    ]
+    cur.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(db_name)))
 
-    results = []
 
-    for tree_name, expected_prefix in test_cases:
-        print(f"\nTesting tree name: '{tree_name}'")
-
-        # Simulate prefix generation (same as in postgresqlenhanced.py)
-        actual_prefix = re.sub(r"[^a-zA-Z0-9_]", "_", tree_name) + "_"
-
-        if actual_prefix != expected_prefix:
-            print(
-                f"  ✗ Prefix mismatch: expected '{expected_prefix}', got '{actual_prefix}'"
-            )
-            results.append(False)
-            continue
-
-        print(f"  ✓ Prefix: '{actual_prefix}'")
-
-        # Create schema with prefix
-        conn_string = f"postgresql://{DB_CONFIG['user']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['test_db']}"
-        conn = PostgreSQLConnection(conn_string)
-
-        schema = PostgreSQLSchema(conn, table_prefix=actual_prefix)
-        schema.check_and_init_schema()
-
-        # Verify tables were created with prefix
-        # PostgreSQL folds unquoted identifiers to lowercase, so search lowercase
-        with conn.execute(
-            """
-            SELECT tablename 
-            FROM pg_tables 
-            WHERE schemaname = 'public' 
-            AND tablename LIKE %s
-            ORDER BY tablename
-        """,
-            [f"{actual_prefix.lower()}%"],
-        ) as cursor:
-            tables = [row[0] for row in cursor]
-
-        # Check core tables
-        core_tables = ["person", "family", "event", "place", "source"]
-        for table in core_tables:
-            prefixed_table = f"{actual_prefix}{table}"
-            # PostgreSQL folds unquoted identifiers to lowercase
-            if prefixed_table.lower() in tables:
-                print(f"  ✓ Found {prefixed_table}")
-            else:
-                print(f"  ✗ Missing {prefixed_table}")
-                results.append(False)
-                break
-        else:
-            results.append(True)
-
-        conn.close()
+def test_table_prefix_creation():
+    """Test that tables are created with correct prefixes."""
+    print("\n=== Testing Table Prefix Creation ===")
 
-    # Cleanup
+    # Create test database; the admin connection is kept for cleanup
     admin_conn = psycopg.connect(
         host=DB_CONFIG["host"],
         port=DB_CONFIG["port"],
@@ -135,13 +94,80 @@ def test_table_prefix_creation():
     admin_conn.autocommit = True
 
     with admin_conn.cursor() as cur:
+        drop_database(cur, DB_CONFIG["test_db"])
         cur.execute(
-            sql.SQL("DROP DATABASE IF EXISTS {}").format(
-                sql.Identifier(DB_CONFIG["test_db"])
-            )
+            sql.SQL("CREATE DATABASE {}").format(sql.Identifier(DB_CONFIG["test_db"]))
         )
 
-    admin_conn.close()
+    # All trees share one database, so one connection serves every schema
+    conn = None
+
+    try:
+        # Test different tree names and their expected prefixes
+        test_cases = [
+            ("smith_family", "smith_family_"),
+            ("jones-research", "jones_research_"),
+            ("wilson.archive", "wilson_archive_"),
+            ("test 123", "test_123_"),
+            ("O'Brien_Family", "O_Brien_Family_"),
+        ]
+
+        results = []
+        created = []
+        conn = PostgreSQLConnection(CONN_STRING)
+
+        for tree_name, expected_prefix in test_cases:
+            print(f"\nTesting tree name: '{tree_name}'")
+
+            # Simulate prefix generation (same as in postgresqlenhanced.py)
+            actual_prefix = SANITIZE_RE.sub("_", tree_name) + "_"
+
+            if actual_prefix != expected_prefix:
+                print(
+                    f"  ✗ Prefix mismatch: expected '{expected_prefix}', got '{actual_prefix}'"
+                )
+                results.append(False)
+                continue
+
+            print(f"  ✓ Prefix: '{actual_prefix}'")
+
+            # Create schema with prefix
+            schema = PostgreSQLSchema(conn, table_prefix=actual_prefix)
+            schema.check_and_init_schema()
+            created.append(actual_prefix)
+
+        # Verify tables were created with prefix, one catalog query for
+        # every tree.  PostgreSQL folds unquoted identifiers to lowercase.
+        expected = [
+            f"{prefix.lower()}{table}"
+            for prefix in created
+            for table in SCHEMA_CHECK_TABLES
+        ]
+        with conn.execute(PREFIX_TABLES_SQL, [expected]) as cursor:
+            found = {row[0] for row in cursor.fetchall()}
+
+        print("\nVerifying prefixed tables:")
+        for prefix in created:
+            for table in SCHEMA_CHECK_TABLES:
+                prefixed_table = f"{prefix}{table}"
+                if prefixed_table.lower() in found:
+                    print(f"  ✓ Found {prefixed_table}")
+                else:
+                    print(f"  ✗ Missing {prefixed_table}")
+                    results.append(False)
+                    break
+            else:
+                results.append(True)
+
+    finally:
+        # Cleanup
+        if conn is not None:
+            conn.close()
+
+        with admin_conn.cursor() as cur:
+            drop_database(cur, DB_CONFIG["test_db"])
+
+        admin_conn.close()
 
     return all(results)
 
@@ -185,15 +211,12 @@ def test_query_modification():
     ]
 
     prefix = "testprefix_"
+    # The wrapper's rewriting needs no live connection
+    wrapper = TablePrefixWrapper(None, prefix)
     all_passed = True
 
-    # Regex pattern to match table names that need prefixing
-    # This is a simplified version - real implementation would be more sophisticated
-    table_pattern = r"\b(person|family|event|place|source|citation|repository|media|note|tag|reference|metadata)\b"
-
     for original, expected_template in test_queries:
-        # Simple table name replacement (actual implementation would use SQL parser)
-        modified = re.sub(table_pattern, lambda m: f"{prefix}{m.group(1)}", original)
+        modified = wrapper._add_table_prefixes(original)
         expected = expected_template.format(prefix=prefix)
 
         if modified == expected:
@@ -228,13 +251,13 @@ def test_data_isolation_sql_injection():
 
     for bad_name in malicious_names:
         # Simulate sanitization
-        sanitized = re.sub(r"[^a-zA-Z0-9_]", "", bad_name) + "_"
+        sanitized = SANITIZE_RE.sub("", bad_name) + "_"
 
         print(f"Malicious input: '{bad_name}'")
         print(f"Sanitized to:    '{sanitized}'")
 
         # Check that sanitized version is safe
-        if re.match(r"^[a-zA-Z0-9_]+_$", sanitized):
+        if VALID_PREFIX_RE.match(sanitized):
             print(f"✓ Safely sanitized\n")
         else:
             print(f"✗ Sanitization failed\n")